@@ -4,155 +4,273 @@ Advanced usage example for Mist Topology Client
 Demonstrates topology analysis and connection mapping
 """
 
+import argparse
 import sys
 import os
-from mist_topology.client import MistBulkTopologyClient, MistConfig, load_config_from_env
+from collections import Counter
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from mist_topology.client import MistBulkTopologyClient, MistConfig, dumps_json, load_config_from_env
+from topology_cache import cached_topology
+from topology_stats import stat_values
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def analyze_topology_connectivity(topology: dict):
+# Below these sizes the plain Python code beats NumPy's setup cost
+NUMPY_MIN_DEVICES = 1024
+NUMPY_MIN_SITES = 1024
+
+
+@dataclass
+class Device:
+    """Device fields the connectivity report prints"""
+    __slots__ = ('mac', 'name', 'type', 'status')
+    mac: str
+    name: str
+    type: str
+    status: str
+    
+    @classmethod
+    def from_dict(cls, device: dict) -> 'Device':
+        g = device.get
+        return cls(g('mac'), g('name', 'Unknown'), g('type', 'unknown'), g('status'))
+
+
+@dataclass
+class Site:
+    """Per-site device totals and type histogram"""
+    __slots__ = ('site_id', 'name', 'total', 'types')
+    site_id: str
+    name: str
+    total: int
+    types: Dict[str, int]
+
+
+def _walk(topology: dict) -> dict:
+    """Walk every site and device once, collecting what the analyses need"""
+    walk = {
+        'connection_counts': {
+            device_mac: len(connections)
+            for device_mac, connections in topology.get('device_connections', {}).items()
+        },
+        'site_type_counts': [],
+        'switches_without_connections': 0,
+        'offline_devices': 0,
+        'sites_without_switches': 0,
+        'report_rows': [],
+        'mac_to_device': {}
+    }
+    
+    for site_id, site_info in topology.get('sites', {}).items():
+        devices = site_info.get('devices', [])
+        device_count = site_info.get('device_count', 0)
+        site_name = site_info.get('site_name')
+        types_list = []
+        
+        for device in devices:
+            g = device.get
+            device_type = g('type', 'unknown')
+            status = g('status')
+            connections = g('connections')
+            types_list.append(device_type)
+            
+            if device_type == 'switch' and not connections:
+                walk['switches_without_connections'] += 1
+            
+            if status in ['offline', 'disconnected']:
+                walk['offline_devices'] += 1
+            
+            walk['mac_to_device'][g('mac')] = device
+        
+        device_types = Counter(types_list)
+        walk['site_type_counts'].append(
+            Site(site_id, 'Unknown' if site_name is None else site_name, device_count, device_types)
+        )
+        
+        # Switch presence falls out of the histogram, no per-device flag needed
+        if 'switch' not in device_types and device_count > 0:
+            walk['sites_without_switches'] += 1
+        
+        walk['report_rows'].append({
+            'site_id': site_id,
+            'site_name': site_name,
+            'device_count': device_count,
+            'devices': devices
+        })
+    
+    return walk
+
+
+def _most_connected(connection_counts: dict):
+    """Return the highest connection count and the MACs that reach it"""
+    if np is not None and len(connection_counts) >= NUMPY_MIN_DEVICES:
+        macs = np.array(list(connection_counts), dtype=object)
+        counts = np.fromiter(connection_counts.values(), dtype=np.int64, count=len(connection_counts))
+        max_connections = int(counts.max())
+        return max_connections, macs[counts == max_connections].tolist()
+    
+    max_connections = -1
+    most_connected = []
+    for mac, count in connection_counts.items():
+        if count > max_connections:
+            max_connections, most_connected = count, [mac]
+        elif count == max_connections:
+            most_connected.append(mac)
+    return max_connections, most_connected
+
+
+def analyze_topology_connectivity(topology: dict, walk: Optional[dict] = None):
     """Analyze topology connectivity patterns"""
     print("\n=== CONNECTIVITY ANALYSIS ===")
     
-    # Analyze device connections
-    device_connections = topology.get('device_connections', {})
-    connection_counts = {}
-    
-    for device_mac, connections in device_connections.items():
-        connection_counts[device_mac] = len(connections)
+    if walk is None:
+        walk = _walk(topology)
+    connection_counts = walk['connection_counts']
     
     # Find most connected devices
     if connection_counts:
-        max_connections = max(connection_counts.values())
-        most_connected = [mac for mac, count in connection_counts.items() if count == max_connections]
+        max_connections, most_connected = _most_connected(connection_counts)
         
         print(f"Most connected device(s): {len(most_connected)} device(s) with {max_connections} connections")
         
-        # Find device details for most connected
-        for site_info in topology.get('sites', {}).values():
-            for device in site_info.get('devices', []):
-                if device.get('mac') in most_connected:
-                    print(f"  - {device.get('name', 'Unknown')} ({device.get('type', 'unknown')})")
+        # Find device details for most connected; only these few get a Device record
+        mac_to_device = walk['mac_to_device']
+        for mac in most_connected:
+            raw = mac_to_device.get(mac)
+            if raw is not None:
+                device = Device.from_dict(raw)
+                print(f"  - {device.name} ({device.type})")
+
+
+def _sort_sites_by_total(sites: list) -> list:
+    """Return sites ordered by device count, largest first, keeping ties in walk order"""
+    if np is not None and len(sites) >= NUMPY_MIN_SITES:
+        totals = np.fromiter((site.total for site in sites), dtype=np.int64, count=len(sites))
+        return [sites[i] for i in np.argsort(-totals, kind='stable')]
+    return sorted(sites, key=lambda site: site.total, reverse=True)
 
 
-def analyze_site_distribution(topology: dict):
+def analyze_site_distribution(topology: dict, walk: Optional[dict] = None):
     """Analyze device distribution across sites"""
     print("\n=== SITE DISTRIBUTION ANALYSIS ===")
     
-    site_stats = []
-    for site_id, site_info in topology.get('sites', {}).items():
-        device_types = {}
-        for device in site_info.get('devices', []):
-            device_type = device.get('type', 'unknown')
-            device_types[device_type] = device_types.get(device_type, 0) + 1
-        
-        site_stats.append({
-            'name': site_info.get('site_name', 'Unknown'),
-            'total': site_info.get('device_count', 0),
-            'types': device_types
-        })
+    if walk is None:
+        walk = _walk(topology)
     
     # Sort sites by device count
-    site_stats.sort(key=lambda x: x['total'], reverse=True)
+    site_stats = _sort_sites_by_total(walk['site_type_counts'])
+    
+    # Format spec parsed once and reused for the header and every row
+    row = "{:<30} {:<8} {:<10} {:<8} {:<10}\n".format
     
-    print(f"{'Site Name':<30} {'Total':<8} {'Switches':<10} {'APs':<8} {'Gateways':<10}")
+    print(row('Site Name', 'Total', 'Switches', 'APs', 'Gateways'), end='')
     print("-" * 76)
     
+    rows = []
     for site in site_stats:
-        switches = site['types'].get('switch', 0)
-        aps = site['types'].get('ap', 0)
-        gateways = site['types'].get('gateway', 0)
-        print(f"{site['name']:<30} {site['total']:<8} {switches:<10} {aps:<8} {gateways:<10}")
+        types = site.types
+        rows.append(row(site.name, site.total, types.get('switch', 0), types.get('ap', 0), types.get('gateway', 0)))
+    
+    # One write for the whole table instead of a print per site
+    sys.stdout.write(''.join(rows))
 
 
-def find_network_issues(topology: dict):
+def find_network_issues(topology: dict, walk: Optional[dict] = None):
     """Identify potential network issues"""
     print("\n=== POTENTIAL ISSUES ANALYSIS ===")
     
+    if walk is None:
+        walk = _walk(topology)
+    
     issues = []
     
     # Check for devices without connections
-    devices_without_connections = 0
-    for site_info in topology.get('sites', {}).values():
-        for device in site_info.get('devices', []):
-            if device.get('type') == 'switch' and not device.get('connections'):
-                devices_without_connections += 1
-    
-    if devices_without_connections > 0:
-        issues.append(f"Found {devices_without_connections} switches without detected connections")
+    if walk['switches_without_connections'] > 0:
+        issues.append(f"Found {walk['switches_without_connections']} switches without detected connections")
     
     # Check for offline devices
-    offline_devices = 0
-    for site_info in topology.get('sites', {}).values():
-        for device in site_info.get('devices', []):
-            if device.get('status') in ['offline', 'disconnected']:
-                offline_devices += 1
-    
-    if offline_devices > 0:
-        issues.append(f"Found {offline_devices} offline/disconnected devices")
+    if walk['offline_devices'] > 0:
+        issues.append(f"Found {walk['offline_devices']} offline/disconnected devices")
     
     # Check for sites without switches
-    sites_without_switches = 0
-    for site_info in topology.get('sites', {}).values():
-        has_switch = any(device.get('type') == 'switch' for device in site_info.get('devices', []))
-        if not has_switch and site_info.get('device_count', 0) > 0:
-            sites_without_switches += 1
-    
-    if sites_without_switches > 0:
-        issues.append(f"Found {sites_without_switches} sites without switches")
+    if walk['sites_without_switches'] > 0:
+        issues.append(f"Found {walk['sites_without_switches']} sites without switches")
     
     if issues:
-        for issue in issues:
-            print(f"⚠️  {issue}")
+        sys.stdout.write(''.join(f"⚠️  {issue}\n" for issue in issues))
     else:
         print("✅ No obvious issues detected")
 
 
-def generate_network_report(topology: dict, filename: str = "network_report.json"):
-    """Generate comprehensive network report"""
-    stats = topology.get('statistics', {})
-    
-    report = {
-        'summary': {
-            'organization_id': topology.get('organization_id'),
-            'discovery_timestamp': topology.get('timestamp'),
-            'api_calls_used': topology.get('api_calls_used', 0),
-            'total_sites': stats.get('total_sites', 0),
-            'total_devices': stats.get('total_devices', 0),
-            'device_breakdown': {
-                'switches': stats.get('total_switches', 0),
-                'access_points': stats.get('total_aps', 0),
-                'gateways': stats.get('total_gateways', 0)
-            },
-            'connectivity': {
-                'total_connections': stats.get('total_connections', 0),
-                'unique_links': stats.get('unique_links', 0),
-                'connected_devices': stats.get('devices_with_connections', 0)
-            }
-        },
-        'site_details': [],
-        'device_inventory': []
-    }
+def _dump_array(items, f):
+    """Write items to f as a compact JSON array, one element at a time"""
+    f.write(b'[')
+    for index, item in enumerate(items):
+        if index:
+            f.write(b',\n')
+        f.write(dumps_json(item))
+    f.write(b']')
+
+
+def write_network_report(topology: dict, filename: str = "network_report.json", walk: Optional[dict] = None,
+                         stats: Optional[dict] = None) -> str:
+    """
+    Write the comprehensive network report to filename without printing anything.
+    Devices are listed once, under site_details; flatten site_details[*].devices
+    for an organization-wide device inventory.
+    """
+    if stats is None:
+        stats = stat_values(topology)
     
-    # Add site details
-    for site_id, site_info in topology.get('sites', {}).items():
-        site_detail = {
-            'site_id': site_id,
-            'site_name': site_info.get('site_name'),
-            'device_count': site_info.get('device_count', 0),
-            'devices': site_info.get('devices', [])
+    if walk is None:
+        walk = _walk(topology)
+    
+    summary = {
+        'organization_id': topology.get('organization_id'),
+        'discovery_timestamp': topology.get('timestamp'),
+        'api_calls_used': topology.get('api_calls_used', 0),
+        'total_sites': stats['total_sites'],
+        'total_devices': stats['total_devices'],
+        'device_breakdown': {
+            'switches': stats['total_switches'],
+            'access_points': stats['total_aps'],
+            'gateways': stats['total_gateways']
+        },
+        'connectivity': {
+            'total_connections': stats['total_connections'],
+            'unique_links': stats['unique_links'],
+            'connected_devices': stats['devices_with_connections']
         }
-        report['site_details'].append(site_detail)
-        report['device_inventory'].extend(site_info.get('devices', []))
+    }
     
-    # Export report
-    with open(filename, 'w') as f:
-        json.dump(report, f, indent=2)
+    # Export report, writing one site/device at a time instead of building it in memory
+    with open(filename, 'wb') as f:
+        f.write(b'{"summary": ')
+        f.write(dumps_json(summary, pretty=True))
+        f.write(b',\n"site_details": ')
+        _dump_array(walk['report_rows'], f)
+        f.write(b'}\n')
     
+    return filename
+
+
+def generate_network_report(topology: dict, filename: str = "network_report.json", walk: Optional[dict] = None):
+    """Generate comprehensive network report"""
+    write_network_report(topology, filename, walk)
     print(f"\n📄 Comprehensive network report generated: {filename}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Advanced Mist topology analysis")
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore the local topology cache and fetch from the API')
+    args = parser.parse_args()
+    
     # Load configuration from .env file
     try:
         config = load_config_from_env()
@@ -169,23 +287,32 @@ def main():
     print("Starting advanced topology analysis...")
     
     # Get complete topology
-    topology = client.get_complete_topology()
+    topology = cached_topology(client, config, refresh=args.refresh)
     
     # Display basic stats
-    stats = topology.get('statistics', {})
+    stats = stat_values(topology)
     print(f"=== DISCOVERY SUMMARY ===")
     print(f"API Calls: {topology.get('api_calls_used', 0)}")
-    print(f"Sites: {stats.get('total_sites', 0)}")
-    print(f"Devices: {stats.get('total_devices', 0)}")
-    print(f"Links: {stats.get('unique_links', 0)}")
+    print(f"Sites: {stats['total_sites']}")
+    print(f"Devices: {stats['total_devices']}")
+    print(f"Links: {stats['unique_links']}")
     
-    # Perform advanced analysis
-    analyze_topology_connectivity(topology)
-    analyze_site_distribution(topology)
-    find_network_issues(topology)
+    # Walk the topology once and share the results across all analyses
+    walk = _walk(topology)
+    
+    # Write the report in the background while the console analyses run;
+    # it is file I/O only, so it overlaps without mixing into the output
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        report = executor.submit(write_network_report, topology, "network_report.json", walk, stats)
+        
+        # Perform advanced analysis
+        analyze_topology_connectivity(topology, walk)
+        analyze_site_distribution(topology, walk)
+        find_network_issues(topology, walk)
+        
+        report_file = report.result()
     
-    # Generate comprehensive report
-    generate_network_report(topology)
+    print(f"\n📄 Comprehensive network report generated: {report_file}")
     
     print(f"\n✅ Advanced analysis complete!")
 
@@ -4,12 +4,22 @@ Simple usage example for Mist Topology Client
 Demonstrates the efficient bulk topology retrieval approach
 """
 
+import argparse
 import sys
 import os
 from mist_topology.client import MistBulkTopologyClient, MistConfig, load_config_from_env
+from topology_cache import cached_device_search, cached_topology
+from topology_stats import stat_values
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Simple Mist topology discovery")
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore the local topology cache and fetch from the API')
+    parser.add_argument('--extended', action='store_true',
+                        help='Also run the device search API example')
+    args = parser.parse_args()
+    
     # Load configuration from .env file
     try:
         # This will automatically load from .env if it exists
@@ -27,33 +37,39 @@ def main():
     print("Starting topology discovery...")
     
     # Get complete topology with just 2 API calls
-    topology = client.get_complete_topology()
+    topology = cached_topology(client, config, refresh=args.refresh)
     
     # Display basic statistics
-    stats = topology.get('statistics', {})
+    stats = stat_values(topology)
     print(f"\n=== Topology Discovery Results ===")
     print(f"API Calls Used: {topology.get('api_calls_used', 0)}")
-    print(f"Total Sites: {stats.get('total_sites', 0)}")
-    print(f"Total Devices: {stats.get('total_devices', 0)}")
-    print(f"- Switches: {stats.get('total_switches', 0)}")
-    print(f"- Access Points: {stats.get('total_aps', 0)}")
-    print(f"- Gateways: {stats.get('total_gateways', 0)}")
-    print(f"Network Links: {stats.get('unique_links', 0)}")
+    print(f"Total Sites: {stats['total_sites']}")
+    print(f"Total Devices: {stats['total_devices']}")
+    print(f"- Switches: {stats['total_switches']}")
+    print(f"- Access Points: {stats['total_aps']}")
+    print(f"- Gateways: {stats['total_gateways']}")
+    print(f"Network Links: {stats['unique_links']}")
     
     # Show site breakdown
     print(f"\n=== Site Breakdown ===")
-    for site_id, site_info in topology.get('sites', {}).items():
-        print(f"Site: {site_info.get('site_name', 'Unknown')}")
-        print(f"  Devices: {site_info.get('device_count', 0)}")
+    sys.stdout.write(''.join(
+        f"Site: {site_info.get('site_name', 'Unknown')}\n  Devices: {site_info.get('device_count', 0)}\n"
+        for site_info in topology.get('sites', {}).values()
+    ))
     
     # Export to file
     client.export_topology_to_file(topology, "simple_topology.json")
     print(f"\nTopology data exported to: simple_topology.json")
     
-    # Example: Search for specific device types
-    print(f"\n=== Device Search Example ===")
-    switches = client.get_device_search(device_type="switch")
-    print(f"Found {len(switches)} switches in organization")
+    # Switches are already part of the topology, no extra API call needed
+    print(f"\n=== Switch Count ===")
+    print(f"Found {stats['total_switches']} switches in organization")
+    
+    # Example: Search for specific device types (one extra API call)
+    if args.extended:
+        print(f"\n=== Device Search Example ===")
+        switches = cached_device_search(client, refresh=args.refresh, device_type="switch")
+        print(f"Found {len(switches)} switches in organization")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Local disk cache for topology discovery results
+Lets the examples re-run their analysis without repeating the Mist API calls
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from mist_topology.client import MistBulkTopologyClient, MistConfig
+
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mist_topology')
+
+# Device search results already seen by this process, keyed by (host, org_id, params)
+_search_cache: Dict[Tuple, Any] = {}
+
+
+def _read_cache(cache_file: str, ttl: int) -> Optional[Any]:
+    """Return the cached JSON in cache_file if it is younger than ttl seconds"""
+    try:
+        age = time.time() - os.path.getmtime(cache_file)
+        if age < ttl:
+            with open(cache_file, 'r') as f:
+                data = json.load(f)
+            print(f"Cache hit: {cache_file} ({int(age)}s old)")
+            return data
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _write_cache(cache_file: str, data: Any):
+    """Store data in cache_file, warning instead of failing if the disk is not writable"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_file, 'w') as f:
+            json.dump(data, f)
+    except OSError as e:
+        print(f"Could not write cache {cache_file}: {e}")
+
+
+def cached_topology(client: MistBulkTopologyClient, config: MistConfig, ttl: int = 300,
+                    refresh: bool = False) -> dict:
+    """
+    Return the organization topology from the local cache when it is younger
+    than ttl seconds, otherwise fetch it from the API and refresh the cache
+    """
+    cache_file = os.path.join(CACHE_DIR, f"{config.host}_{config.org_id}.json")
+
+    if not refresh:
+        topology = _read_cache(cache_file, ttl)
+        if topology is not None:
+            # The stored count belongs to the run that filled the cache; this one made no calls
+            topology['api_calls_used'] = 0
+            return topology
+
+    print("Topology cache miss, fetching from Mist API...")
+    topology = client.get_complete_topology()
+    _write_cache(cache_file, topology)
+    return topology
+
+
+def cached_device_search(client: MistBulkTopologyClient, ttl: int = 300, refresh: bool = False,
+                         **params) -> list:
+    """
+    Memoized client.get_device_search: repeated searches with the same parameters
+    are answered from memory within a process and from disk across runs
+    """
+    config = client.config
+    key = (config.host, config.org_id, tuple(sorted(params.items())))
+
+    if not refresh and key in _search_cache:
+        return _search_cache[key]
+
+    params_hash = hashlib.sha1(json.dumps(key[2]).encode('utf-8')).hexdigest()[:12]
+    cache_file = os.path.join(CACHE_DIR, f"{config.host}_{config.org_id}_search_{params_hash}.json")
+
+    devices = None if refresh else _read_cache(cache_file, ttl)
+    if devices is None:
+        devices = client.get_device_search(**params)
+        # get_device_search returns [] on errors, which must not be cached
+        if not devices:
+            return devices
+        _write_cache(cache_file, devices)
+
+    _search_cache[key] = devices
+    return devices
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Topology statistics fields shared by the Python examples
+"""
+
+from typing import Any, Dict
+
+
+STAT_KEYS = (
+    'total_sites', 'total_devices', 'total_switches', 'total_aps', 'total_gateways',
+    'total_connections', 'unique_links', 'devices_with_connections'
+)
+
+
+def stat_values(topology: Dict[str, Any]) -> Dict[str, Any]:
+    """Read every statistics field the examples report once, defaulting to 0"""
+    stats = topology.get('statistics', {})
+    return {key: stats.get(key, 0) for key in STAT_KEYS}
@@ -20,6 +20,10 @@ setup(
         "requests",
         "python-dotenv",
     ],
+    extras_require={
+        "fast": ["orjson", "pysimdjson"],
+        "async": ["aiohttp"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 
 import argparse
-import json
 import sys
 import os
 import time
-from pathlib import Path
-from .client import MistBulkTopologyClient, MistConfig, load_config_from_env, load_config_from_file
+from collections import Counter
+from .client import (
+    MistBulkTopologyClient, MistConfig, dumps_json, format_timestamp, load_config_from_env, load_config_from_file
+)
 
 
 def safe_get(obj, key, default="N/A"):
@@ -14,9 +15,16 @@ def safe_get(obj, key, default="N/A"):
     Safely get a value from a dictionary-like object.
     Returns 'N/A' if obj is a string or doesn't have the get method.
     """
-    if isinstance(obj, str) or not hasattr(obj, 'get'):
+    # Exact-type checks first: plain dicts are by far the common case
+    obj_type = type(obj)
+    if obj_type is dict:
+        return obj.get(key, default)
+    if obj_type is str:
+        return default
+    try:
+        return obj.get(key, default)
+    except AttributeError:
         return default
-    return obj.get(key, default)
 
 
 def safe_contains(obj, key):
@@ -24,9 +32,9 @@ def safe_contains(obj, key):
     Safely check if a key exists in a dictionary-like object.
     Returns False if obj is a string or doesn't support 'in' operator.
     """
-    if isinstance(obj, str) or not isinstance(obj, dict):
-        return False
-    return key in obj
+    if type(obj) is dict:
+        return key in obj
+    return isinstance(obj, dict) and key in obj
 
 
 def safe_access(obj, key, default="N/A"):
@@ -34,7 +42,10 @@ def safe_access(obj, key, default="N/A"):
     Safely access a dictionary value using bracket notation.
     Returns default if obj is a string or doesn't support bracket access.
     """
-    if isinstance(obj, str) or not hasattr(obj, '__getitem__'):
+    obj_type = type(obj)
+    if obj_type is dict:
+        return obj.get(key, default)
+    if obj_type is str:
         return default
     try:
         return obj[key]
@@ -42,6 +53,59 @@ def safe_access(obj, key, default="N/A"):
         return default
 
 
+# Stand-in for malformed (non-dict) entries: every field lookup returns its default
+_NO_FIELDS = {}
+
+
+def _section(topology, key):
+    """Return topology[key] when it is a dict, otherwise an empty dict"""
+    value = safe_get(topology, key, None)
+    return value if isinstance(value, dict) else {}
+
+
+def _atomic_write(filename, data):
+    """
+    Write data (bytes) to filename in one write via a temporary file and os.replace,
+    so an interrupted run never leaves a truncated file behind.
+    """
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'wb', buffering=1 << 20) as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+def _device_counts(topology):
+    """Count sites, devices and device types straight from the site device lists"""
+    sites = _section(topology, 'sites')
+    type_counts = Counter(
+        safe_get(device, 'type', 'unknown')
+        for site_info in sites.values()
+        for device in safe_get(site_info, 'devices', [])
+    )
+    return {
+        'total_sites': len(sites),
+        'total_devices': sum(type_counts.values()),
+        'total_switches': type_counts['switch'],
+        'total_aps': type_counts['ap'],
+        'total_gateways': type_counts['gateway']
+    }
+
+
+def _summary_stats(topology):
+    """Return the topology statistics, counting devices from the sites when they are missing"""
+    return _section(topology, 'statistics') or _device_counts(topology)
+
+
+def _write_json(obj, filename):
+    """Serialize obj as indented JSON (with orjson when installed) and write it atomically to filename"""
+    _atomic_write(filename, dumps_json(obj, pretty=True))
+
+
 def create_sample_config():
     """Create a sample .env configuration file"""
     sample_env = '''# Mist Systems API Configuration
@@ -67,8 +131,7 @@ API_RATE_LIMIT=5
 '''
     
     config_file = ".env.template"
-    with open(config_file, 'w') as f:
-        f.write(sample_env)
+    _atomic_write(config_file, sample_env.encode('utf-8'))
     
     print(f"Sample configuration created: {config_file}")
     print("Copy this to .env and edit with your actual values:")
@@ -80,24 +143,71 @@ API_RATE_LIMIT=5
     print("- HOST: Use your regional API endpoint (api.mist.com, api.eu.mist.com, etc.)")
 
 
-def create_topology_hierarchy(topology: dict) -> dict:
+def _discovery_info(topology: dict) -> dict:
+    """Read the discovery fields shared by the summary and the hierarchy"""
+    timestamp = safe_get(topology, 'timestamp', 'Unknown')
+    return {
+        "organization_id": safe_get(topology, 'organization_id', 'Unknown'),
+        "api_calls_used": safe_get(topology, 'api_calls_used', 0),
+        "timestamp": timestamp,
+        "discovery_time": format_timestamp(time.time() if timestamp == 'Unknown' else timestamp)
+    }
+
+
+def _hierarchy_connection(conn) -> dict:
+    """Build one connection entry of the topology hierarchy"""
+    get = (conn if isinstance(conn, dict) else _NO_FIELDS).get
+    return {
+        "local_port": get('port', 'Unknown'),
+        "neighbor_mac": get('neighbor_mac', 'Unknown'),
+        "neighbor_port": get('neighbor_port', 'Unknown'),
+        "neighbor_system": get('neighbor_system', 'Unknown'),
+        "status": get('status', 'unknown'),
+        "protocol": get('protocol', 'Unknown')
+    }
+
+
+def _hierarchy_device(device, device_connections: dict) -> dict:
+    """Build one device entry of the topology hierarchy, including its connections"""
+    get = (device if isinstance(device, dict) else _NO_FIELDS).get
+    device_mac = get('mac', 'N/A')
+    return {
+        "name": get('name', 'Unknown'),
+        "mac": device_mac,
+        "model": get('model', 'Unknown'),
+        "type": get('type', 'unknown'),
+        "status": get('status', 'unknown'),
+        "serial": get('serial', 'Unknown'),
+        "connections": [_hierarchy_connection(conn) for conn in device_connections.get(device_mac) or []]
+    }
+
+
+def create_topology_hierarchy(topology: dict, discovery: dict = None) -> dict:
     """Create a hierarchical representation of the network topology"""
+    if discovery is None:
+        discovery = _discovery_info(topology)
+    
     hierarchy = {
         "organization": {
-            "organization_id": safe_get(topology, 'organization_id', 'Unknown'),
+            "organization_id": discovery["organization_id"],
             "discovery_info": {
-                "timestamp": safe_get(topology, 'timestamp', 'Unknown'),
-                "discovery_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(safe_get(topology, 'timestamp', time.time()))),
-                "api_calls_used": safe_get(topology, 'api_calls_used', 0)
+                "timestamp": discovery["timestamp"],
+                "discovery_time": discovery["discovery_time"],
+                "api_calls_used": discovery["api_calls_used"]
             },
             "sites": []
         }
     }
     
     # Process each site
-    sites_data = safe_get(topology, 'sites', {})
+    sites_data = _section(topology, 'sites')
     topology_links = safe_get(topology, 'topology_links', [])
-    device_connections = safe_get(topology, 'device_connections', {})
+    device_connections = _section(topology, 'device_connections')
+    
+    # Sites each device MAC belongs to, and each site's connections section,
+    # filled per site so the links can be classified in one pass at the end
+    mac_sites = {}
+    site_connections = {}
     
     for site_id, site_info in sites_data.items():
         site_hierarchy = {
@@ -117,131 +227,110 @@ def create_topology_hierarchy(topology: dict) -> dict:
             }
         }
         
-        # Process devices in this site
+        # Device type -> category list dispatch for this site
+        device_types = site_hierarchy["device_types"]
+        buckets = {
+            'switch': device_types["switches"],
+            'ap': device_types["access_points"],
+            'gateway': device_types["gateways"]
+        }
+        other = device_types["other"]
+        
+        # Process devices in this site: build every entry in one comprehension,
+        # then partition them by type
         devices = safe_get(site_info, 'devices', [])
-        for device in devices:
-            device_mac = safe_get(device, 'mac')
-            device_type = safe_get(device, 'type', 'unknown')
-            
-            device_info = {
-                "name": safe_get(device, 'name', 'Unknown'),
-                "mac": device_mac,
-                "model": safe_get(device, 'model', 'Unknown'),
-                "type": device_type,
-                "status": safe_get(device, 'status', 'unknown'),
-                "serial": safe_get(device, 'serial', 'Unknown'),
-                "connections": []
-            }
-            
-            # Add device connections if available
-            if device_mac in device_connections:
-                device_connections_list = device_connections[device_mac]
-                for conn in device_connections_list:
-                    connection_info = {
-                        "local_port": safe_access(conn, 'port', 'Unknown'),
-                        "neighbor_mac": safe_get(conn, 'neighbor_mac', 'Unknown'),
-                        "neighbor_port": safe_get(conn, 'neighbor_port', 'Unknown'),
-                        "neighbor_system": safe_get(conn, 'neighbor_system', 'Unknown'),
-                        "status": safe_get(conn, 'status', 'unknown'),
-                        "protocol": safe_get(conn, 'protocol', 'Unknown')
-                    }
-                    device_info["connections"].append(connection_info)
-            
-            # Categorize device by type
-            if device_type == 'switch':
-                site_hierarchy["device_types"]["switches"].append(device_info)
-            elif device_type == 'ap':
-                site_hierarchy["device_types"]["access_points"].append(device_info)
-            elif device_type == 'gateway':
-                site_hierarchy["device_types"]["gateways"].append(device_info)
-            else:
-                site_hierarchy["device_types"]["other"].append(device_info)
-            
-            # Check if device has connections
-            if not device_info["connections"]:
-                site_hierarchy["connections"]["unconnected_devices"].append({
-                    "name": device_info["name"],
-                    "mac": device_info["mac"],
-                    "type": device_info["type"]
-                })
+        device_infos = [_hierarchy_device(device, device_connections) for device in devices]
+        for device_info in device_infos:
+            buckets.get(device_info["type"], other).append(device_info)
         
-        # Process topology links for this site
-        for link in topology_links:
-            source_mac = safe_access(link, 'source_mac', '')
-            target_mac = safe_get(link, 'target_mac', '')
-            
-            # Check if this link involves devices from this site
-            source_in_site = any(safe_get(dev, 'mac') == source_mac for dev in devices)
-            target_in_site = any(safe_get(dev, 'mac') == target_mac for dev in devices)
-            
-            if source_in_site or target_in_site:
-                link_info = {
-                    "source_device": safe_get(link, 'source_name', 'Unknown'),
-                    "source_mac": source_mac,
-                    "source_port": safe_access(link, 'source_port', 'Unknown'),
-                    "target_mac": target_mac,
-                    "target_port": safe_get(link, 'target_port', 'Unknown'),
-                    "status": safe_get(link, 'link_status', 'unknown'),
-                    "speed_mbps": safe_get(link, 'speed_mbps', 'Unknown'),
-                    "protocol": safe_get(link, 'protocol', 'Unknown')
-                }
-                
-                # Determine if it's an internal or external link
-                if source_in_site and target_in_site:
-                    site_hierarchy["connections"]["internal_links"].append(link_info)
-                else:
-                    site_hierarchy["connections"]["external_links"].append(link_info)
+        # Devices without connections
+        site_hierarchy["connections"]["unconnected_devices"] = [
+            {"name": device_info["name"], "mac": device_info["mac"], "type": device_info["type"]}
+            for device_info in device_infos if not device_info["connections"]
+        ]
+        
+        # Record this site's device MACs for the link pass
+        for mac in {safe_get(dev, 'mac') for dev in devices}:
+            mac_sites.setdefault(mac, []).append(site_id)
+        site_connections[site_id] = site_hierarchy["connections"]
         
         hierarchy["organization"]["sites"].append(site_hierarchy)
     
+    # Process topology links once, filing each under the sites of its endpoints
+    for link in topology_links:
+        source_mac = safe_access(link, 'source_mac', '')
+        target_mac = safe_get(link, 'target_mac', '')
+        
+        source_sites = mac_sites.get(source_mac, [])
+        target_sites = mac_sites.get(target_mac, [])
+        if not source_sites and not target_sites:
+            continue
+        
+        link_info = {
+            "source_device": safe_get(link, 'source_name', 'Unknown'),
+            "source_mac": source_mac,
+            "source_port": safe_access(link, 'source_port', 'Unknown'),
+            "target_mac": target_mac,
+            "target_port": safe_get(link, 'target_port', 'Unknown'),
+            "status": safe_get(link, 'link_status', 'unknown'),
+            "speed_mbps": safe_get(link, 'speed_mbps', 'Unknown'),
+            "protocol": safe_get(link, 'protocol', 'Unknown')
+        }
+        
+        involved_sites = source_sites + [site_id for site_id in target_sites if site_id not in source_sites]
+        for index, site_id in enumerate(involved_sites):
+            # Internal when both ends are in this site, external otherwise
+            if site_id in source_sites and site_id in target_sites:
+                links = site_connections[site_id]["internal_links"]
+            else:
+                links = site_connections[site_id]["external_links"]
+            links.append(dict(link_info) if index else link_info)
+    
     return hierarchy
 
 
-def save_topology_hierarchy(topology: dict, filename: str = "mist_topology_hierarchy.json"):
-    """Save the topology hierarchy to a JSON file"""
-    hierarchy = create_topology_hierarchy(topology)
+def save_topology_hierarchy(topology: dict, filename: str = "mist_topology_hierarchy.json", hierarchy: dict = None):
+    """Save the topology hierarchy (built from topology unless given) to a JSON file"""
+    if hierarchy is None:
+        hierarchy = create_topology_hierarchy(topology)
     
-    with open(filename, 'w') as f:
-        json.dump(hierarchy, f, indent=2)
+    _write_json(hierarchy, filename)
     
     print(f"Topology hierarchy saved to: {filename}")
     return filename
 
 
-def create_topology_summary(topology: dict) -> dict:
+def create_topology_summary(topology: dict, discovery: dict = None) -> dict:
     """Create a structured summary of the topology data"""
-    stats = safe_get(topology, 'statistics', {})
+    stats = _summary_stats(topology)
+    if discovery is None:
+        discovery = _discovery_info(topology)
     
     summary = {
-        "summary_info": {
-            "organization_id": safe_get(topology, 'organization_id', 'Unknown'),
-            "api_calls_used": safe_get(topology, 'api_calls_used', 0),
-            "timestamp": safe_get(topology, 'timestamp', 'Unknown'),
-            "discovery_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(safe_get(topology, 'timestamp', time.time())))
-        },
+        "summary_info": dict(discovery),
         "infrastructure": {
-            "sites": safe_get(stats, 'total_sites', 0),
-            "total_devices": safe_get(stats, 'total_devices', 0),
-            "switches": safe_get(stats, 'total_switches', 0),
-            "access_points": safe_get(stats, 'total_aps', 0),
-            "gateways": safe_get(stats, 'total_gateways', 0)
+            "sites": stats.get('total_sites', 0),
+            "total_devices": stats.get('total_devices', 0),
+            "switches": stats.get('total_switches', 0),
+            "access_points": stats.get('total_aps', 0),
+            "gateways": stats.get('total_gateways', 0)
         },
         "connectivity": {
-            "total_connections": safe_get(stats, 'total_connections', 0),
-            "unique_links": safe_get(stats, 'unique_links', 0),
-            "devices_with_connections": safe_get(stats, 'devices_with_connections', 0)
+            "total_connections": stats.get('total_connections', 0),
+            "unique_links": stats.get('unique_links', 0),
+            "devices_with_connections": stats.get('devices_with_connections', 0)
         }
     }
     
     return summary
 
 
-def save_topology_summary(topology: dict, filename: str = "mist_topology_summary.json"):
-    """Save the topology summary to a JSON file"""
-    summary = create_topology_summary(topology)
+def save_topology_summary(topology: dict, filename: str = "mist_topology_summary.json", summary: dict = None):
+    """Save the topology summary (built from topology unless given) to a JSON file"""
+    if summary is None:
+        summary = create_topology_summary(topology)
     
-    with open(filename, 'w') as f:
-        json.dump(summary, f, indent=2)
+    _write_json(summary, filename)
     
     print(f"Topology summary saved to: {filename}")
     return filename
@@ -250,90 +339,119 @@ def save_topology_summary(topology: dict, filename: str = "mist_topology_summary
 def display_topology_summary(topology: dict, save_to_file: bool = True, filename: str = "mist_topology_summary.json", 
                            save_hierarchy: bool = True, hierarchy_filename: str = "mist_topology_hierarchy.json"):
     """Display a summary of the retrieved topology and optionally save to JSON"""
-    stats = safe_get(topology, 'statistics', {})
+    summary = print_topology_summary(topology)
+    save_topology_outputs(topology, save_to_file, filename, save_hierarchy, hierarchy_filename, summary)
+
+
+def print_topology_summary(topology: dict, summary: dict = None) -> dict:
+    """Print the topology summary (built from topology unless given) and return it for saving"""
+    if summary is None:
+        summary = create_topology_summary(topology)
+    info = summary["summary_info"]
+    infrastructure = summary["infrastructure"]
+    connectivity = summary["connectivity"]
     
-    print(f"\n{'='*50}")
-    print(f"MIST TOPOLOGY SUMMARY")
-    print(f"{'='*50}")
-    print(f"Organization ID: {safe_get(topology, 'organization_id', 'Unknown')}")
-    print(f"API Calls Used: {safe_get(topology, 'api_calls_used', 0)}")
-    print(f"Timestamp: {safe_get(topology, 'timestamp', 'Unknown')}")
-    print(f"\nINFRASTRUCTURE:")
-    print(f"  Sites: {safe_get(stats, 'total_sites', 0)}")
-    print(f"  Total Devices: {safe_get(stats, 'total_devices', 0)}")
-    print(f"  - Switches: {safe_get(stats, 'total_switches', 0)}")
-    print(f"  - Access Points: {safe_get(stats, 'total_aps', 0)}")
-    print(f"  - Gateways: {safe_get(stats, 'total_gateways', 0)}")
-    print(f"\nCONNECTIVITY:")
-    print(f"  Total Connections: {safe_get(stats, 'total_connections', 0)}")
-    print(f"  Unique Links: {safe_get(stats, 'unique_links', 0)}")
-    print(f"  Devices with Connections: {safe_get(stats, 'devices_with_connections', 0)}")
+    # Build the whole report and emit it with one write
+    lines = [
+        f"\n{'='*50}",
+        f"MIST TOPOLOGY SUMMARY",
+        f"{'='*50}",
+        f"Organization ID: {info['organization_id']}",
+        f"API Calls Used: {info['api_calls_used']}",
+        f"Timestamp: {info['timestamp']}",
+        f"\nINFRASTRUCTURE:",
+        f"  Sites: {infrastructure['sites']}",
+        f"  Total Devices: {infrastructure['total_devices']}",
+        f"  - Switches: {infrastructure['switches']}",
+        f"  - Access Points: {infrastructure['access_points']}",
+        f"  - Gateways: {infrastructure['gateways']}",
+        f"\nCONNECTIVITY:",
+        f"  Total Connections: {connectivity['total_connections']}",
+        f"  Unique Links: {connectivity['unique_links']}",
+        f"  Devices with Connections: {connectivity['devices_with_connections']}"
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
     
-    # Save to JSON files
-    if save_to_file:
-        save_topology_summary(topology, filename)
+    return summary
+
+
+def save_topology_outputs(topology: dict, save_summary: bool = True, summary_filename: str = "mist_topology_summary.json",
+                          save_hierarchy: bool = True, hierarchy_filename: str = "mist_topology_hierarchy.json",
+                          summary: dict = None):
+    """
+    Save the requested JSON outputs, reusing summary when it was already built.
+    The hierarchy, the expensive one, is only built when save_hierarchy is set.
+    """
+    if save_summary:
+        save_topology_summary(topology, summary_filename, summary)
     
     if save_hierarchy:
-        save_topology_hierarchy(topology, hierarchy_filename)
+        # summary_info carries the same discovery fields the hierarchy header needs
+        discovery = summary["summary_info"] if summary is not None else None
+        save_topology_hierarchy(topology, hierarchy_filename, create_topology_hierarchy(topology, discovery))
 
 
 def display_site_details(topology: dict):
     """Display detailed site information"""
-    print(f"\n{'='*50}")
-    print(f"SITE DETAILS")
-    print(f"{'='*50}")
+    lines = [f"\n{'='*50}", f"SITE DETAILS", f"{'='*50}"]
     
-    for site_id, site_info in safe_get(topology, 'sites', {}).items():
-        print(f"\nSite: {safe_get(site_info, 'site_name', 'Unknown')} ({site_id})")
-        print(f"  Device Count: {safe_get(site_info, 'device_count', 0)}")
-        
-        for device in safe_get(site_info, 'devices', []):
-            status = safe_get(device, 'status', 'unknown')
-            print(f"    - {safe_get(device, 'name', 'Unknown')} ({safe_get(device, 'type', 'unknown')}) - {status}")
+    for site_id, site_info in _section(topology, 'sites').items():
+        lines.append(f"\nSite: {safe_get(site_info, 'site_name', 'Unknown')} ({site_id})")
+        lines.append(f"  Device Count: {safe_get(site_info, 'device_count', 0)}")
+        lines.extend(
+            f"    - {safe_get(device, 'name', 'Unknown')} ({safe_get(device, 'type', 'unknown')}) - "
+            f"{safe_get(device, 'status', 'unknown')}"
+            for device in safe_get(site_info, 'devices', [])
+        )
+    
+    # One write for the whole report instead of a print per device
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def export_topology(topology: dict, output_format: str, filename: str):
     """Export topology in various formats"""
     if output_format.lower() == 'json':
-        with open(filename, 'w') as f:
-            json.dump(topology, f, indent=2)
+        _write_json(topology, filename)
         print(f"Topology exported to {filename} (JSON format)")
     
     elif output_format.lower() == 'csv':
         import csv
         
+        # Derive both CSV names from the stem, e.g. topology.csv -> topology_devices.csv
+        stem, ext = os.path.splitext(filename)
+        ext = ext or '.csv'
+        
         # Export devices to CSV
-        devices_file = filename.replace('.csv', '_devices.csv')
-        with open(devices_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Site', 'Device Name', 'MAC', 'Type', 'Model', 'Status'])
-            
-            for site_info in safe_get(topology, 'sites', {}).values():
-                for device in safe_get(site_info, 'devices', []):
-                    writer.writerow([
-                        safe_get(site_info, 'site_name', ''),
-                        safe_get(device, 'name', ''),
-                        safe_get(device, 'mac', ''),
-                        safe_get(device, 'type', ''),
-                        safe_get(device, 'model', ''),
-                        safe_get(device, 'status', '')
-                    ])
+        devices_file = f"{stem}_devices{ext}"
+        device_rows = [['Site', 'Device Name', 'MAC', 'Type', 'Model', 'Status']]
+        for site_info in _section(topology, 'sites').values():
+            site_name = safe_get(site_info, 'site_name', '')
+            device_rows.extend([
+                site_name,
+                safe_get(device, 'name', ''),
+                safe_get(device, 'mac', ''),
+                safe_get(device, 'type', ''),
+                safe_get(device, 'model', ''),
+                safe_get(device, 'status', '')
+            ] for device in safe_get(site_info, 'devices', []))
+        
+        with open(devices_file, 'w', newline='', buffering=1 << 20) as f:
+            csv.writer(f).writerows(device_rows)
         
         # Export links to CSV
-        links_file = filename.replace('.csv', '_links.csv')
-        with open(links_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Source Device', 'Source Port', 'Target MAC', 'Target Port', 'Status', 'Speed'])
-            
-            for link in safe_get(topology, 'topology_links', []):
-                writer.writerow([
-                    safe_get(link, 'source_name', ''),
-                    safe_get(link, 'source_port', ''),
-                    safe_get(link, 'target_mac', ''),
-                    safe_get(link, 'target_port', ''),
-                    safe_get(link, 'link_status', ''),
-                    safe_get(link, 'speed_mbps', '')
-                ])
+        links_file = f"{stem}_links{ext}"
+        link_rows = [['Source Device', 'Source Port', 'Target MAC', 'Target Port', 'Status', 'Speed']]
+        link_rows.extend([
+            safe_get(link, 'source_name', ''),
+            safe_get(link, 'source_port', ''),
+            safe_get(link, 'target_mac', ''),
+            safe_get(link, 'target_port', ''),
+            safe_get(link, 'link_status', ''),
+            safe_get(link, 'speed_mbps', '')
+        ] for link in safe_get(topology, 'topology_links', []))
+        
+        with open(links_file, 'w', newline='', buffering=1 << 20) as f:
+            csv.writer(f).writerows(link_rows)
         
         print(f"Topology exported to {devices_file} and {links_file} (CSV format)")
 
@@ -426,15 +544,14 @@ Examples:
         # Load configuration with priority: .env -> JSON config -> environment variables
         config = None
         
-        # Try .env file first
-        if os.path.exists('.env'):
-            try:
-                config = load_config_from_env('.env')
-            except ValueError:
-                pass
+        # Try .env file first; a missing file raises instead of being checked up front
+        try:
+            config = load_config_from_env('.env', require_file=True)
+        except (FileNotFoundError, ValueError):
+            pass
         
         # Try JSON config file if specified and .env didn't work
-        if not config and os.path.exists(args.config_file):
+        if not config:
             try:
                 config = load_config_from_file(args.config_file)
                 print(f"Using configuration from {args.config_file}")
@@ -444,7 +561,7 @@ Examples:
         # Try environment variables as fallback
         if not config:
             try:
-                config = load_config_from_env(env_file='nonexistent')
+                config = load_config_from_env(env_file=None)
                 print("Using configuration from environment variables")
             except ValueError:
                 pass
@@ -467,8 +584,10 @@ Examples:
             
             # Display options
             if args.summary or (not args.site_details and not args.export):
-                display_topology_summary(topology, save_to_file=args.save_summary, filename=args.summary_file,
-                                        save_hierarchy=args.save_hierarchy, hierarchy_filename=args.hierarchy_file)
+                summary = print_topology_summary(topology)
+                save_topology_outputs(topology, save_summary=args.save_summary, summary_filename=args.summary_file,
+                                      save_hierarchy=args.save_hierarchy, hierarchy_filename=args.hierarchy_file,
+                                      summary=summary)
             
             if args.site_details:
                 display_site_details(topology)
@@ -1,10 +1,42 @@
+import itertools
 import json
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Union
 import os
 from dataclasses import dataclass
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# asyncio and aiohttp are slow to import and only needed by the async path,
+# so _load_async_modules binds them on first use
+asyncio = None
+aiohttp = None
+
+
+def _load_async_modules():
+    """Import asyncio and the optional aiohttp once, binding them module-wide"""
+    global asyncio, aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp as aiohttp_module
+        except ImportError:
+            raise ImportError("aiohttp is required for get_complete_topology_async: pip install mist_topology[async]")
+        import asyncio as asyncio_module
+        asyncio, aiohttp = asyncio_module, aiohttp_module
 
 
 def safe_get(obj: Any, key: str, default: Any = "N/A") -> Any:
@@ -12,9 +44,16 @@ def safe_get(obj: Any, key: str, default: Any = "N/A") -> Any:
     Safely get a value from a dictionary-like object.
     Returns 'N/A' if obj is a string or doesn't have the get method.
     """
-    if isinstance(obj, str) or not hasattr(obj, 'get'):
+    # Exact-type checks first: plain dicts are by far the common case
+    obj_type = type(obj)
+    if obj_type is dict:
+        return obj.get(key, default)
+    if obj_type is str:
+        return default
+    try:
+        return obj.get(key, default)
+    except AttributeError:
         return default
-    return obj.get(key, default)
 
 
 def safe_contains(obj: Any, key: str) -> bool:
@@ -22,9 +61,9 @@ def safe_contains(obj: Any, key: str) -> bool:
     Safely check if a key exists in a dictionary-like object.
     Returns False if obj is a string or doesn't support 'in' operator.
     """
-    if isinstance(obj, str) or not isinstance(obj, dict):
-        return False
-    return key in obj
+    if type(obj) is dict:
+        return key in obj
+    return isinstance(obj, dict) and key in obj
 
 
 def safe_access(obj: Any, key: str, default: Any = "N/A") -> Any:
@@ -32,7 +71,10 @@ def safe_access(obj: Any, key: str, default: Any = "N/A") -> Any:
     Safely access a dictionary value using bracket notation.
     Returns default if obj is a string or doesn't support bracket access.
     """
-    if isinstance(obj, str) or not hasattr(obj, '__getitem__'):
+    obj_type = type(obj)
+    if obj_type is dict:
+        return obj.get(key, default)
+    if obj_type is str:
         return default
     try:
         return obj[key]
@@ -40,6 +82,77 @@ def safe_access(obj: Any, key: str, default: Any = "N/A") -> Any:
         return default
 
 
+def parse_json(content: bytes) -> Any:
+    """
+    Parse a JSON response body into plain Python objects.
+    Uses simdjson or orjson when installed, otherwise the standard library json module.
+    """
+    if simdjson is not None:
+        return simdjson.loads(content)
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps_json(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize obj to JSON bytes, compact unless pretty is set.
+    Uses orjson when it is installed, otherwise the standard library json module.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def write_json(obj: Any, filename: str, pretty: bool = False):
+    """
+    Write obj to filename as JSON, compact unless pretty is set.
+    Uses orjson when it is installed, otherwise the standard library json module.
+    """
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(dumps_json(obj, pretty))
+    elif pretty:
+        with open(filename, 'w') as f:
+            json.dump(obj, f, indent=2)
+    else:
+        with open(filename, 'w') as f:
+            json.dump(obj, f, separators=(',', ':'))
+
+
+@lru_cache(maxsize=8)
+def format_timestamp(timestamp: float) -> str:
+    """
+    Format a topology timestamp as local time.
+    Cached because every export of the same topology formats the same value.
+    """
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+# Devices requested per organization inventory page
+INVENTORY_PAGE_LIMIT = 1000
+
+
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+
+def mac_to_int(mac: Any) -> Optional[int]:
+    """
+    Parse a 48-bit MAC address into an integer, or None if it is not one.
+    Separators (':', '-', '.') and letter case are ignored, so 'aabbccddeeff'
+    and 'AA:BB:CC:DD:EE:FF' give the same value; anything that is not exactly
+    12 hex digits after removing separators is rejected.
+    """
+    if type(mac) is not str:
+        return None
+    digits = mac.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12 or not _HEX_DIGITS.issuperset(digits):
+        return None
+    return int(digits, 16)
+
+
 @dataclass
 class MistConfig:
     """Configuration for Mist API client"""
@@ -48,6 +161,9 @@ class MistConfig:
     host: str = "api.mist.com"
     timeout: int = 30
     max_retries: int = 3
+    max_workers: int = 16
+    cache_ttl: int = 0
+    cache_size: int = 1024
 
 
 class MistBulkTopologyClient:
@@ -65,6 +181,29 @@ class MistBulkTopologyClient:
         }
         self.topology_cache = {}
         self.api_call_count = 0
+        self._calls_announced = 0
+        self._count_lock = threading.Lock()
+        
+        # Parsed GET responses keyed by URL: url -> (expires_at, result)
+        self._request_cache = {}
+        self._cache_lock = threading.Lock()
+        
+        # Keep-alive session so every call after the first reuses a pooled TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        pool_size = max(32, config.max_workers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+    
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def get_complete_topology(self) -> Dict:
         """
@@ -73,18 +212,29 @@ class MistBulkTopologyClient:
         """
         print("Fetching complete organization topology...")
         self.api_call_count = 0
-        
-        # Step 1: Single call for ALL devices across ALL sites
-        all_devices = self._get_organization_inventory()
-        
-        # Step 2: Get sites list for site-level stats calls
-        sites = self._get_sites_from_devices(all_devices)
-        
-        # Step 3: Get site information (names, addresses, etc.)
-        sites_info = self._get_sites_info(sites)
-        
-        # Step 4: Get detailed stats from each site (includes LLDP data)
-        all_stats = self._get_sites_stats(sites)
+        self._calls_announced = 0
+        self.expire_cache()
+        
+        all_devices = []
+        sites = []
+        seen_sites = set()
+        stats_futures = []
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+            # Steps 1-2: Page through ALL devices across ALL sites; each newly seen
+            # site's stats request starts while later inventory pages are fetched
+            for page in self._iter_organization_inventory():
+                all_devices.extend(page)
+                new_sites = [site_id for site_id in self._get_sites_from_devices(page) if site_id not in seen_sites]
+                seen_sites.update(new_sites)
+                sites.extend(new_sites)
+                for url in self._sites_stats_urls(new_sites):
+                    stats_futures.append(executor.submit(self._make_request, url))
+            
+            # Step 3: Get site information (names, addresses, etc.)
+            sites_info = self._get_sites_info(sites)
+            
+            # Step 4: Collect detailed stats from each site (includes LLDP data)
+            all_stats = self._merge_sites_stats([future.result() for future in stats_futures])
         
         # Step 5: Build complete topology map locally
         topology = self._build_topology_map(all_devices, all_stats, sites_info)
@@ -96,46 +246,84 @@ class MistBulkTopologyClient:
         topology['api_calls_used'] = self.api_call_count
         return topology
     
-    def _get_organization_inventory(self) -> List[Dict]:
-        """Get all devices across organization in single API call"""
-        url = f"{self.base_url}/orgs/{self.config.org_id}/inventory"
-        print(f"API Call {self.api_call_count + 1}: Getting organization inventory...")
-        result = self._make_request(url)
+    def _iter_organization_inventory(self):
+        """Yield the organization inventory one page of devices at a time"""
+        previous_first = None
+        for page in itertools.count(1):
+            url = self._inventory_page_url(page)
+            devices = self._inventory_page_devices(page, self._make_request(url))
+            if self._inventory_page_repeats(devices, previous_first):
+                return
+            yield devices
+            if len(devices) < INVENTORY_PAGE_LIMIT:
+                return
+            previous_first = devices[0]
+    
+    def _inventory_page_url(self, page: int) -> str:
+        """Build the URL for one organization inventory page, announcing the call"""
+        self._announce_call(f"Getting organization inventory (page {page})...")
+        return f"{self.base_url}/orgs/{self.config.org_id}/inventory?limit={INVENTORY_PAGE_LIMIT}&page={page}"
+    
+    def _inventory_page_devices(self, page: int, result: Optional[Any]) -> List[Dict]:
+        """
+        Return the devices on one inventory page. A failed request raises instead
+        of ending pagination, which would silently drop every later device
+        """
+        if result is None:
+            raise RuntimeError(f"Inventory page {page} request failed; the topology would be incomplete")
         return result if isinstance(result, list) else []
     
+    def _inventory_page_repeats(self, devices: List[Dict], previous_first: Any) -> bool:
+        """
+        Detect a server or proxy that ignores the page parameter: a full page
+        starting with the same device as the previous one ends pagination
+        """
+        if previous_first is not None and devices and devices[0] == previous_first:
+            print("Inventory page repeats the previous page, stopping pagination")
+            return True
+        return False
+    
+    def _announce_call(self, description: str):
+        """Print the sequence number and purpose of the API call about to be issued"""
+        with self._count_lock:
+            self._calls_announced += 1
+            number = self._calls_announced
+        print(f"API Call {number}: {description}")
+    
     def _get_sites_from_devices(self, devices: List[Dict]) -> List[str]:
         """Extract unique site IDs from device inventory"""
-        sites = set()
-        for device in devices:
-            site_id = safe_get(device, 'site_id')
-            if site_id and site_id != 'unassigned':
-                sites.add(site_id)
-        return list(sites)
+        # Devices without a site are filed under 'unassigned' and need no site stats call
+        site_ids = {device.get('site_id') for device in devices if isinstance(device, dict)}
+        return [site_id for site_id in site_ids if site_id and site_id != 'unassigned']
     
     def _get_sites_info(self, site_ids: List[str]) -> Dict[str, Dict]:
         """Get site information including names for the given site IDs"""
-        sites_info = {}
-        
         # Get organization sites
         url = f"{self.base_url}/orgs/{self.config.org_id}/sites"
-        print(f"API Call {self.api_call_count + 1}: Getting organization sites...")
+        self._announce_call("Getting organization sites...")
         org_sites = self._make_request(url)
         
-        if org_sites:
-            for site in org_sites:
-                site_id = safe_get(site, 'id')
-                if site_id in site_ids:
-                    sites_info[site_id] = {
-                        'site_id': site_id,
-                        'site_name': safe_get(site, 'name', f'Site-{site_id[:8]}'),
-                        'address': safe_get(site, 'address', 'Unknown'),
-                        'timezone': safe_get(site, 'timezone', 'Unknown'),
-                        'country_code': safe_get(site, 'country_code', 'Unknown')
-                    }
+        return self._sites_info_from_org_sites(site_ids, org_sites)
+    
+    def _sites_info_from_org_sites(self, site_ids: List[str], org_sites: Optional[List[Dict]]) -> Dict[str, Dict]:
+        """Build site information for the given site IDs from the organization sites list"""
+        sites_info = {}
+        
+        # Index org sites by id once so each requested site is a single lookup
+        org_index = {safe_get(site, 'id'): site for site in org_sites} if org_sites else {}
         
-        # Fill in any missing sites with default info
         for site_id in site_ids:
-            if site_id not in sites_info:
+            site = org_index.get(site_id)
+            if site is not None:
+                sites_info[site_id] = {
+                    'site_id': site_id,
+                    'site_name': safe_get(site, 'name', f'Site-{site_id[:8]}'),
+                    'address': safe_get(site, 'address', 'Unknown'),
+                    'timezone': safe_get(site, 'timezone', 'Unknown'),
+                    'country_code': safe_get(site, 'country_code', 'Unknown')
+                }
+            else:
+                # Fill in missing sites with default info
                 sites_info[site_id] = {
                     'site_id': site_id,
                     'site_name': f'Site-{site_id[:8]}',
@@ -146,13 +334,18 @@ class MistBulkTopologyClient:
         
         return sites_info
     
-    def _get_sites_stats(self, sites: List[str]) -> List[Dict]:
-        """Get device statistics from all sites (includes LLDP and port data)"""
-        all_stats = []
+    def _sites_stats_urls(self, sites: List[str]) -> List[str]:
+        """Build the per-site device statistics URLs, announcing each call"""
+        urls = []
         for site_id in sites:
-            url = f"{self.base_url}/sites/{site_id}/stats/devices"
-            print(f"API Call {self.api_call_count + 1}: Getting device statistics for site {site_id[:8]}...")
-            site_stats = self._make_request(url)
+            urls.append(f"{self.base_url}/sites/{site_id}/stats/devices")
+            self._announce_call(f"Getting device statistics for site {site_id[:8]}...")
+        return urls
+    
+    def _merge_sites_stats(self, results: List[Optional[List[Dict]]]) -> List[Dict]:
+        """Concatenate per-site statistics, skipping failed requests"""
+        all_stats = []
+        for site_stats in results:
             if site_stats:
                 all_stats.extend(site_stats)
         return all_stats
@@ -163,10 +356,7 @@ class MistBulkTopologyClient:
         without additional API calls
         """
         # Create lookup tables for efficient processing
-        stats_by_mac = {}
-        for stat in stats:
-            if isinstance(stat, dict) and 'mac' in stat:
-                stats_by_mac[safe_access(stat, 'mac')] = stat
+        stats_by_mac = {stat['mac']: stat for stat in stats if isinstance(stat, dict) and 'mac' in stat}
         
         topology = {
             'organization_id': self.config.org_id,
@@ -178,124 +368,159 @@ class MistBulkTopologyClient:
             'timestamp': int(time.time())
         }
         
-        # Process each device from inventory
+        # Undirected edges, deduplicated while links are built. Each edge is keyed
+        # by its two MACs packed into one int (low << 64 | high); MACs that do
+        # not parse fall back to a (low_mac, high_mac) tuple. Because of the
+        # packing, unique_links treats one MAC written in different formats
+        # (bare inventory MAC vs colon-separated LLDP chassis_id) as one device
+        seen_edges = set()
+        
+        # Bound list appends for the per-type collections, one lookup per device
+        append_by_type = {device_type: bucket.append for device_type, bucket in topology['devices_by_type'].items()}
+        
+        # Local bindings for everything the device loop touches on each iteration
+        sites = topology['sites']
+        device_connections = topology['device_connections']
+        append_link = topology['topology_links'].append
+        add_edge = seen_edges.add
+        extract_connections = self._extract_connections_from_stats
+        
+        # Process each device from inventory. Inventory entries come straight from
+        # the parsed JSON response, so after one type check plain dict access is safe
         for device in devices:
-            site_id = safe_get(device, 'site_id', 'unassigned')
-            device_type = safe_get(device, 'type', 'unknown')
-            device_mac = safe_get(device, 'mac')
+            if not isinstance(device, dict):
+                continue
             
-            # Initialize site if not exists
-            if site_id not in topology['sites']:
+            site_id = device.get('site_id', 'unassigned')
+            device_type = device.get('type', 'unknown')
+            device_mac = device.get('mac', 'N/A')
+            device_name = device.get('name', 'N/A')
+            device_key = mac_to_int(device_mac)
+            
+            # Initialize site if not exists; the bucket is bound once per device
+            site_bucket = sites.get(site_id)
+            if site_bucket is None:
                 site_info = sites_info.get(site_id, {})
-                topology['sites'][site_id] = {
+                site_bucket = sites[site_id] = {
                     'site_id': site_id,
-                    'site_name': safe_get(site_info, 'site_name', f'Site-{site_id[:8]}'),
-                    'address': safe_get(site_info, 'address', 'Unknown'),
-                    'timezone': safe_get(site_info, 'timezone', 'Unknown'),
-                    'country_code': safe_get(site_info, 'country_code', 'Unknown'),
+                    'site_name': site_info.get('site_name', f'Site-{site_id[:8]}'),
+                    'address': site_info.get('address', 'Unknown'),
+                    'timezone': site_info.get('timezone', 'Unknown'),
+                    'country_code': site_info.get('country_code', 'Unknown'),
                     'devices': [],
                     'device_count': 0
                 }
             
             # Build device entry with stats if available
             device_entry = {
-                'name': safe_get(device, 'name'),
+                'name': device_name,
                 'mac': device_mac,
-                'serial': safe_get(device, 'serial'),
-                'model': safe_get(device, 'model'),
+                'serial': device.get('serial', 'N/A'),
+                'model': device.get('model', 'N/A'),
                 'type': device_type,
                 'site_id': site_id
             }
             
             # Merge statistics if available
-            if device_mac in stats_by_mac:
-                device_stats = stats_by_mac[device_mac]
-                device_entry['status'] = safe_get(device_stats, 'status', 'unknown')
-                device_entry['uptime'] = safe_get(device_stats, 'uptime')
-                device_entry['version'] = safe_get(device_stats, 'version')
+            device_stats = stats_by_mac.get(device_mac)
+            if device_stats is not None:
+                device_entry['status'] = device_stats.get('status', 'unknown')
+                device_entry['uptime'] = device_stats.get('uptime', 'N/A')
+                device_entry['version'] = device_stats.get('version', 'N/A')
                 
                 # Extract connectivity information
-                connections = self._extract_connections_from_stats(device_stats)
+                connections = extract_connections(device_stats)
                 if connections:
                     device_entry['connections'] = connections
-                    topology['device_connections'][device_mac] = connections
+                    device_connections[device_mac] = connections
                     
                     # Build topology links
                     for conn in connections:
-                        topology['topology_links'].append({
+                        target_mac = conn.get('neighbor_mac', 'N/A')
+                        if target_mac:
+                            target_key = mac_to_int(target_mac)
+                            if device_key is not None and target_key is not None:
+                                add_edge((device_key << 64) | target_key if device_key <= target_key
+                                         else (target_key << 64) | device_key)
+                            else:
+                                add_edge((device_mac, target_mac) if device_mac <= target_mac else (target_mac, device_mac))
+                        
+                        append_link({
                             'source_mac': device_mac,
-                            'source_port': safe_access(conn, 'port'),
-                            'source_name': safe_get(device, 'name'),
-                            'target_mac': safe_get(conn, 'neighbor_mac'),
-                            'target_port': safe_get(conn, 'neighbor_port'),
-                            'link_status': safe_get(conn, 'status', 'up'),
-                            'speed_mbps': safe_get(conn, 'speed'),
-                            'protocol': safe_get(conn, 'protocol', 'LLDP')
+                            'source_port': conn.get('port', 'N/A'),
+                            'source_name': device_name,
+                            'target_mac': target_mac,
+                            'target_port': conn.get('neighbor_port', 'N/A'),
+                            'link_status': conn.get('status', 'up'),
+                            'speed_mbps': conn.get('speed', 'N/A'),
+                            'protocol': conn.get('protocol', 'LLDP')
                         })
             
             # Add to appropriate collections
-            topology['sites'][site_id]['devices'].append(device_entry)
-            topology['sites'][site_id]['device_count'] += 1
+            site_bucket['devices'].append(device_entry)
+            site_bucket['device_count'] += 1
             
-            if device_type in topology['devices_by_type']:
-                topology['devices_by_type'][device_type].append(device_entry)
+            append_to_type = append_by_type.get(device_type)
+            if append_to_type is not None:
+                append_to_type(device_entry)
         
         # Calculate topology statistics
-        topology['statistics'] = self._calculate_topology_stats(topology)
+        topology['statistics'] = self._calculate_topology_stats(topology, seen_edges)
         
         return topology
     
     def _extract_connections_from_stats(self, device_stats: Dict) -> List[Dict]:
         """Extract all connectivity information from device statistics"""
         connections = []
+        append = connections.append
         
         # Process port statistics
-        if safe_contains(device_stats, 'port_stat'):
-            for port in safe_access(device_stats, 'port_stat', []):
-                if safe_get(port, 'up'):
-                    connection = {
-                        'port': safe_get(port, 'port_id'),
-                        'status': 'up',
-                        'speed': safe_get(port, 'speed'),
-                        'rx_bytes': safe_get(port, 'rx_bytes', 0),
-                        'tx_bytes': safe_get(port, 'tx_bytes', 0)
-                    }
-                    
-                    # Add neighbor information if available
-                    if safe_get(port, 'neighbor_mac'):
-                        connection.update({
-                            'neighbor_mac': safe_access(port, 'neighbor_mac'),
-                            'neighbor_port': safe_get(port, 'neighbor_port'),
-                            'neighbor_system': safe_get(port, 'neighbor_system_name')
-                        })
-                    
-                    connections.append(connection)
-        
-        # Process LLDP information (primary source for topology connections)
-        if safe_contains(device_stats, 'lldp_stat'):
-            for lldp in safe_access(device_stats, 'lldp_stat', []):
+        for port in device_stats.get('port_stat') or []:
+            if not isinstance(port, dict):
+                continue
+            get = port.get
+            if get('up', 'N/A'):
                 connection = {
-                    'port': safe_get(lldp, 'local_port_id') or safe_get(lldp, 'port_id'),
-                    'neighbor_mac': safe_get(lldp, 'chassis_id'),
-                    'neighbor_port': safe_get(lldp, 'port_id'),
-                    'neighbor_system': safe_get(lldp, 'system_name'),
-                    'neighbor_description': safe_get(lldp, 'port_desc'),
-                    'protocol': 'LLDP',
-                    'status': 'discovered'
+                    'port': get('port_id', 'N/A'),
+                    'status': 'up',
+                    'speed': get('speed', 'N/A'),
+                    'rx_bytes': get('rx_bytes', 0),
+                    'tx_bytes': get('tx_bytes', 0)
                 }
-                connections.append(connection)
+                
+                # Add neighbor information if available
+                neighbor_mac = get('neighbor_mac', 'N/A')
+                if neighbor_mac:
+                    connection['neighbor_mac'] = neighbor_mac
+                    connection['neighbor_port'] = get('neighbor_port', 'N/A')
+                    connection['neighbor_system'] = get('neighbor_system_name', 'N/A')
+                
+                append(connection)
+        
+        # Process LLDP information (primary source for topology connections)
+        for lldp in device_stats.get('lldp_stat') or []:
+            if not isinstance(lldp, dict):
+                continue
+            get = lldp.get
+            append({
+                'port': get('local_port_id', 'N/A') or get('port_id', 'N/A'),
+                'neighbor_mac': get('chassis_id', 'N/A'),
+                'neighbor_port': get('port_id', 'N/A'),
+                'neighbor_system': get('system_name', 'N/A'),
+                'neighbor_description': get('port_desc', 'N/A'),
+                'protocol': 'LLDP',
+                'status': 'discovered'
+            })
         
         return connections
     
-    def _calculate_topology_stats(self, topology: Dict) -> Dict:
-        """Calculate topology statistics from processed data"""
+    def _calculate_topology_stats(self, topology: Dict, seen_edges: set) -> Dict:
+        """
+        Calculate topology statistics from processed data.
+        seen_edges is the undirected edge set collected by _build_topology_map.
+        """
         total_links = len(topology['topology_links'])
-        unique_links = len(set(
-            (min(safe_access(link, 'source_mac', ''), safe_get(link, 'target_mac', '')),
-             max(safe_access(link, 'source_mac', ''), safe_get(link, 'target_mac', '')))
-            for link in topology['topology_links']
-            if safe_get(link, 'target_mac')
-        ))
+        unique_links = len(seen_edges)
         
         return {
             'total_sites': len(topology['sites']),
@@ -317,20 +542,90 @@ class MistBulkTopologyClient:
         Get discovered switches for all sites (requires site-level calls)
         Only use when unmanaged device discovery is essential
         """
-        discovered = {}
-        for site_id in sites.keys():
-            url = f"{self.base_url}/sites/{site_id}/discovered_switches"
+        site_ids = list(sites.keys())
+        return self._merge_discovered_switches(site_ids, self._make_requests(self._discovered_switches_urls(site_ids)))
+    
+    def _discovered_switches_urls(self, site_ids: List[str]) -> List[str]:
+        """Build the per-site discovered switches URLs, announcing each call"""
+        urls = []
+        for site_id in site_ids:
+            urls.append(f"{self.base_url}/sites/{site_id}/discovered_switches")
             print(f"Additional API Call: Getting discovered switches for site {site_id}")
-            result = self._make_request(url)
+        return urls
+    
+    def _merge_discovered_switches(self, site_ids: List[str], results: List[Optional[Dict]]) -> Dict:
+        """Map each site to its discovered switches, skipping failed requests"""
+        discovered = {}
+        for site_id, result in zip(site_ids, results):
             if result:
                 discovered[site_id] = result
         return discovered
     
-    def _make_request(self, url: str) -> Optional[Dict]:
-        """Make API request with error handling and rate limiting"""
+    def _make_requests(self, urls: List[str]) -> List[Optional[Dict]]:
+        """Fetch independent URLs concurrently, returning results in the same order"""
+        if len(urls) <= 1:
+            return [self._make_request(url) for url in urls]
+        
+        with ThreadPoolExecutor(max_workers=min(self.config.max_workers, len(urls))) as executor:
+            return list(executor.map(self._make_request, urls))
+    
+    def _cached_response(self, url: str) -> Optional[Any]:
+        """Return the cached result for url if it has not expired"""
+        with self._cache_lock:
+            entry = self._request_cache.get(url)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._request_cache[url]
+                return None
+            return entry[1]
+    
+    def _cache_response(self, url: str, result: Any):
+        """Remember a successful result for config.cache_ttl seconds, evicting the oldest entry when full"""
+        if self.config.cache_ttl <= 0 or self.config.cache_size <= 0 or result is None:
+            return
+        now = time.time()
+        with self._cache_lock:
+            cache = self._request_cache
+            # Re-insert at the end so the cache stays ordered by expiry time
+            cache.pop(url, None)
+            self._drop_expired(now)
+            if len(cache) >= self.config.cache_size:
+                del cache[next(iter(cache))]
+            cache[url] = (now + self.config.cache_ttl, result)
+    
+    def _drop_expired(self, now: float):
+        """Release expired entries; they sit at the front since all share one TTL (hold _cache_lock)"""
+        cache = self._request_cache
+        while cache:
+            url = next(iter(cache))
+            if cache[url][0] > now:
+                break
+            del cache[url]
+    
+    def expire_cache(self):
+        """Release every cached API response whose TTL has passed"""
+        with self._cache_lock:
+            self._drop_expired(time.time())
+    
+    def clear_cache(self):
+        """Drop every cached API response"""
+        with self._cache_lock:
+            self._request_cache.clear()
+    
+    def _make_request(self, url: str, no_cache: bool = False) -> Optional[Dict]:
+        """
+        Make API request with error handling and rate limiting.
+        Results are reused for config.cache_ttl seconds unless no_cache is set.
+        """
+        if not no_cache:
+            cached = self._cached_response(url)
+            if cached is not None:
+                return cached
+        
         for attempt in range(self.config.max_retries):
             try:
-                response = requests.get(url, headers=self.headers, timeout=self.config.timeout)
+                response = self.session.get(url, timeout=self.config.timeout)
                 
                 # Handle rate limiting
                 if response.status_code == 429:
@@ -340,8 +635,11 @@ class MistBulkTopologyClient:
                     continue
                 
                 response.raise_for_status()
-                self.api_call_count += 1
-                return response.json()
+                with self._count_lock:
+                    self.api_call_count += 1
+                result = parse_json(response.content)
+                self._cache_response(url, result)
+                return result
                 
             except requests.exceptions.Timeout:
                 if attempt == self.config.max_retries - 1:
@@ -349,7 +647,7 @@ class MistBulkTopologyClient:
                     raise
                 time.sleep(2 ** attempt)  # Exponential backoff
                 
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, ValueError) as e:
                 if attempt == self.config.max_retries - 1:
                     print(f"Error making request to {url}: {e}")
                     return None
@@ -357,14 +655,109 @@ class MistBulkTopologyClient:
         
         return None
     
-    def export_topology_to_file(self, topology: Dict, filename: str = "topology.json"):
-        """Export topology to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(topology, f, indent=2)
+    async def get_complete_topology_async(self) -> Dict:
+        """
+        Async variant of get_complete_topology. Per-site requests are driven
+        concurrently on one event loop through a pooled aiohttp session
+        (requires the optional aiohttp dependency)
+        """
+        _load_async_modules()
+        
+        print("Fetching complete organization topology...")
+        self.api_call_count = 0
+        self._calls_announced = 0
+        self.expire_cache()
+        
+        connector = aiohttp.TCPConnector(limit=self.config.max_workers)
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
+            # Step 1: Page through ALL devices across ALL sites
+            all_devices = []
+            previous_first = None
+            for page in itertools.count(1):
+                devices = self._inventory_page_devices(
+                    page, await self._make_request_async(session, self._inventory_page_url(page)))
+                if self._inventory_page_repeats(devices, previous_first):
+                    break
+                all_devices.extend(devices)
+                if len(devices) < INVENTORY_PAGE_LIMIT:
+                    break
+                previous_first = devices[0]
+            
+            # Step 2: Get sites list for site-level stats calls
+            sites = self._get_sites_from_devices(all_devices)
+            
+            # Step 3: Get site information (names, addresses, etc.)
+            url = f"{self.base_url}/orgs/{self.config.org_id}/sites"
+            self._announce_call("Getting organization sites...")
+            sites_info = self._sites_info_from_org_sites(sites, await self._make_request_async(session, url))
+            
+            # Step 4: Get detailed stats from all sites concurrently
+            all_stats = self._merge_sites_stats(
+                await self._make_requests_async(session, self._sites_stats_urls(sites)))
+            
+            # Step 5: Build complete topology map locally
+            topology = self._build_topology_map(all_devices, all_stats, sites_info)
+            
+            # Optional Step 6: Get discovered switches
+            if self._needs_discovered_switches():
+                site_ids = list(topology['sites'].keys())
+                topology['discovered_switches'] = self._merge_discovered_switches(
+                    site_ids, await self._make_requests_async(session, self._discovered_switches_urls(site_ids)))
+        
+        topology['api_calls_used'] = self.api_call_count
+        return topology
+    
+    async def _make_requests_async(self, session: Any, urls: List[str]) -> List[Optional[Dict]]:
+        """Fetch independent URLs concurrently on the event loop, returning results in order"""
+        return list(await asyncio.gather(*(self._make_request_async(session, url) for url in urls)))
+    
+    async def _make_request_async(self, session: Any, url: str, no_cache: bool = False) -> Optional[Dict]:
+        """Async counterpart of _make_request with the same retry, rate limit and cache handling"""
+        if not no_cache:
+            cached = self._cached_response(url)
+            if cached is not None:
+                return cached
+        
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        for attempt in range(self.config.max_retries):
+            try:
+                async with session.get(url, timeout=timeout) as response:
+                    # Handle rate limiting
+                    if response.status == 429:
+                        wait_time = int(response.headers.get('Retry-After', 60))
+                        print(f"Rate limit reached, waiting {wait_time} seconds...")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    
+                    response.raise_for_status()
+                    result = parse_json(await response.read())
+                
+                with self._count_lock:
+                    self.api_call_count += 1
+                self._cache_response(url, result)
+                return result
+                
+            except asyncio.TimeoutError:
+                if attempt == self.config.max_retries - 1:
+                    print(f"Timeout error after {self.config.max_retries} attempts: {url}")
+                    raise
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                
+            except (aiohttp.ClientError, ValueError) as e:
+                if attempt == self.config.max_retries - 1:
+                    print(f"Error making request to {url}: {e}")
+                    return None
+                await asyncio.sleep(2 ** attempt)
+        
+        return None
+    
+    def export_topology_to_file(self, topology: Dict, filename: str = "topology.json", pretty: bool = False):
+        """Export topology to JSON file (indented when pretty is set)"""
+        write_json(topology, filename, pretty)
         print(f"Topology exported to {filename}")
     
-    def export_topology_summary(self, topology: Dict, filename: str = "mist_topology_summary.json"):
-        """Export topology summary to JSON file"""
+    def export_topology_summary(self, topology: Dict, filename: str = "mist_topology_summary.json", pretty: bool = False):
+        """Export topology summary to JSON file (indented when pretty is set)"""
         stats = safe_get(topology, 'statistics', {})
         
         summary = {
@@ -372,7 +765,7 @@ class MistBulkTopologyClient:
                 "organization_id": safe_get(topology, 'organization_id', 'Unknown'),
                 "api_calls_used": safe_get(topology, 'api_calls_used', 0),
                 "timestamp": safe_get(topology, 'timestamp', 'Unknown'),
-                "discovery_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(safe_get(topology, 'timestamp', time.time())))
+                "discovery_time": format_timestamp(safe_get(topology, 'timestamp', time.time()))
             },
             "infrastructure": {
                 "sites": safe_get(stats, 'total_sites', 0),
@@ -388,103 +781,135 @@ class MistBulkTopologyClient:
             }
         }
         
-        with open(filename, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json(summary, filename, pretty)
         print(f"Topology summary exported to {filename}")
         return filename
     
-    def export_topology_hierarchy(self, topology: Dict, filename: str = "mist_topology_hierarchy.json"):
-        """Export detailed topology hierarchy to JSON file"""
-        hierarchy = {
-            "organization": {
-                "organization_id": safe_get(topology, 'organization_id', 'Unknown'),
-                "discovery_info": {
-                    "timestamp": safe_get(topology, 'timestamp', 'Unknown'),
-                    "discovery_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(safe_get(topology, 'timestamp', time.time()))),
-                    "api_calls_used": safe_get(topology, 'api_calls_used', 0)
-                },
-                "sites": []
-            }
+    def export_topology_hierarchy(self, topology: Dict, filename: str = "mist_topology_hierarchy.json", pretty: bool = False):
+        """
+        Export detailed topology hierarchy to JSON file (indented when pretty is set).
+        Sites are written one at a time, so only one site's subtree is held in memory.
+        """
+        discovery_info = {
+            "timestamp": safe_get(topology, 'timestamp', 'Unknown'),
+            "discovery_time": format_timestamp(safe_get(topology, 'timestamp', time.time())),
+            "api_calls_used": safe_get(topology, 'api_calls_used', 0)
         }
         
-        # Process each site
         sites_data = safe_get(topology, 'sites', {})
-        topology_links = safe_get(topology, 'topology_links', [])
         device_connections = safe_get(topology, 'device_connections', {})
         
-        for site_id, site_info in sites_data.items():
-            site_hierarchy = {
-                "site_id": site_id,
-                "site_name": safe_get(site_info, 'site_name', 'Unknown'),
-                "device_count": safe_get(site_info, 'device_count', 0),
-                "device_types": {
-                    "switches": [],
-                    "access_points": [],
-                    "gateways": [],
-                    "other": []
-                },
-                "connections": {
-                    "internal_links": [],
-                    "external_links": [],
-                    "unconnected_devices": []
-                }
-            }
+        # Wrapper pieces laid out like a single indent=2 dump when pretty is set;
+        # nested values are re-indented to the depth they are written at
+        if pretty:
+            newline = b'\n'
+            indent = b'  '
+            key_sep = b': '
+        else:
+            newline = indent = b''
+            key_sep = b':'
+        
+        def nested(obj: Any, depth: int) -> bytes:
+            return dumps_json(obj, pretty).replace(b'\n', newline + indent * depth)
+        
+        with open(filename, 'wb') as f:
+            f.write(b'{' + newline + indent + b'"organization"' + key_sep + b'{')
+            f.write(newline + indent * 2 + b'"organization_id"' + key_sep)
+            f.write(dumps_json(safe_get(topology, 'organization_id', 'Unknown')))
+            f.write(b',' + newline + indent * 2 + b'"discovery_info"' + key_sep)
+            f.write(nested(discovery_info, 2))
+            f.write(b',' + newline + indent * 2 + b'"sites"' + key_sep + b'[')
             
-            # Process devices in this site
-            devices = safe_get(site_info, 'devices', [])
-            for device in devices:
-                device_mac = safe_get(device, 'mac')
-                device_type = safe_get(device, 'type', 'unknown')
-                
-                device_info = {
-                    "name": safe_get(device, 'name', 'Unknown'),
-                    "mac": device_mac,
-                    "model": safe_get(device, 'model', 'Unknown'),
-                    "type": device_type,
-                    "status": safe_get(device, 'status', 'unknown'),
-                    "serial": safe_get(device, 'serial', 'Unknown'),
-                    "connections": []
-                }
-                
-                # Add device connections if available
-                if device_mac in device_connections:
-                    device_connections_list = device_connections[device_mac]
-                    for conn in device_connections_list:
-                        connection_info = {
-                            "local_port": safe_access(conn, 'port', 'Unknown'),
-                            "neighbor_mac": safe_get(conn, 'neighbor_mac', 'Unknown'),
-                            "neighbor_port": safe_get(conn, 'neighbor_port', 'Unknown'),
-                            "neighbor_system": safe_get(conn, 'neighbor_system', 'Unknown'),
-                            "status": safe_get(conn, 'status', 'unknown'),
-                            "protocol": safe_get(conn, 'protocol', 'Unknown')
-                        }
-                        device_info["connections"].append(connection_info)
-                
-                # Categorize device by type
-                if device_type == 'switch':
-                    site_hierarchy["device_types"]["switches"].append(device_info)
-                elif device_type == 'ap':
-                    site_hierarchy["device_types"]["access_points"].append(device_info)
-                elif device_type == 'gateway':
-                    site_hierarchy["device_types"]["gateways"].append(device_info)
-                else:
-                    site_hierarchy["device_types"]["other"].append(device_info)
-                
-                # Check if device has connections
-                if not device_info["connections"]:
-                    site_hierarchy["connections"]["unconnected_devices"].append({
-                        "name": device_info["name"],
-                        "mac": device_info["mac"],
-                        "type": device_info["type"]
-                    })
+            # Process each site
+            for index, (site_id, site_info) in enumerate(sites_data.items()):
+                if index:
+                    f.write(b',')
+                f.write(newline + indent * 3)
+                f.write(nested(self._site_hierarchy(site_id, site_info, device_connections), 3))
             
-            hierarchy["organization"]["sites"].append(site_hierarchy)
+            if sites_data:
+                f.write(newline + indent * 2)
+            f.write(b']' + newline + indent + b'}' + newline + b'}')
         
-        with open(filename, 'w') as f:
-            json.dump(hierarchy, f, indent=2)
         print(f"Topology hierarchy exported to {filename}")
         return filename
     
+    def _site_hierarchy(self, site_id: str, site_info: Dict, device_connections: Dict) -> Dict:
+        """Build one site's subtree of the topology hierarchy export"""
+        site_hierarchy = {
+            "site_id": site_id,
+            "site_name": safe_get(site_info, 'site_name', 'Unknown'),
+            "device_count": safe_get(site_info, 'device_count', 0),
+            "device_types": {
+                "switches": [],
+                "access_points": [],
+                "gateways": [],
+                "other": []
+            },
+            "connections": {
+                "internal_links": [],
+                "external_links": [],
+                "unconnected_devices": []
+            }
+        }
+        
+        # Device type -> category list dispatch for this site
+        device_types = site_hierarchy["device_types"]
+        buckets = {
+            'switch': device_types["switches"],
+            'ap': device_types["access_points"],
+            'gateway': device_types["gateways"]
+        }
+        other = device_types["other"]
+        
+        # Process devices in this site
+        devices = safe_get(site_info, 'devices', [])
+        for device in devices:
+            if not isinstance(device, dict):
+                continue
+            
+            device_mac = device.get('mac', 'N/A')
+            device_type = device.get('type', 'unknown')
+            
+            device_info = {
+                "name": device.get('name', 'Unknown'),
+                "mac": device_mac,
+                "model": device.get('model', 'Unknown'),
+                "type": device_type,
+                "status": device.get('status', 'unknown'),
+                "serial": device.get('serial', 'Unknown'),
+                "connections": []
+            }
+            
+            # Add device connections if available
+            if device_mac in device_connections:
+                device_connections_list = device_connections[device_mac]
+                for conn in device_connections_list:
+                    if not isinstance(conn, dict):
+                        continue
+                    connection_info = {
+                        "local_port": conn.get('port', 'Unknown'),
+                        "neighbor_mac": conn.get('neighbor_mac', 'Unknown'),
+                        "neighbor_port": conn.get('neighbor_port', 'Unknown'),
+                        "neighbor_system": conn.get('neighbor_system', 'Unknown'),
+                        "status": conn.get('status', 'unknown'),
+                        "protocol": conn.get('protocol', 'Unknown')
+                    }
+                    device_info["connections"].append(connection_info)
+            
+            # Categorize device by type
+            buckets.get(device_type, other).append(device_info)
+            
+            # Check if device has connections
+            if not device_info["connections"]:
+                site_hierarchy["connections"]["unconnected_devices"].append({
+                    "name": device_info["name"],
+                    "mac": device_info["mac"],
+                    "type": device_info["type"]
+                })
+        
+        return site_hierarchy
+    
     def get_device_search(self, device_type: Optional[str] = None, limit: int = 1000) -> List[Dict]:
         """Search for specific device types across organization"""
         url = f"{self.base_url}/orgs/{self.config.org_id}/devices/search"
@@ -493,21 +918,27 @@ class MistBulkTopologyClient:
             params['type'] = device_type
             
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=self.config.timeout)
             response.raise_for_status()
-            self.api_call_count += 1
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            with self._count_lock:
+                self.api_call_count += 1
+            return parse_json(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error searching devices: {e}")
             return []
 
 
-def load_config_from_env(env_file: str = '.env') -> MistConfig:
-    """Load configuration from environment variables, optionally from .env file"""
+def load_config_from_env(env_file: Optional[str] = '.env', require_file: bool = False) -> MistConfig:
+    """
+    Load configuration from environment variables, optionally from .env file.
+    Pass env_file=None to skip the file; with require_file a missing file raises FileNotFoundError.
+    """
     # Load .env file if it exists
-    if os.path.exists(env_file):
+    if env_file and os.path.exists(env_file):
         load_dotenv(env_file)
         print(f"Loaded configuration from {env_file}")
+    elif require_file:
+        raise FileNotFoundError(f"Environment file {env_file} not found")
     
     # Try multiple environment variable naming conventions
     token = (os.getenv('API_TOKEN') or 